@@ -9,17 +9,20 @@
 from __future__ import annotations
 
 import io
+import os
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from src.app_core import (
     load_config,
     fit_on_full_and_save,
-    load_model,
-    predict_needs_upgrade,
-    fit_model_and_evaluate,
+    predict_needs_upgrade_cached,
+    transform_train_test,
+    compare_models,
 )
+from src.data_loader import TICKETS_DTYPES
 from src.eda import (
     plot_ticket_counts_by_department,
     plot_ticket_counts_by_device_type,
@@ -34,9 +37,95 @@ from src.evaluation import (
 )
 
 
+DEFAULT_DATA_CSV = "data/sample_tickets.csv"
+DEFAULT_DATA_PARQUET = "data/sample_tickets.parquet"
+
+
+@st.cache_data(show_spinner=False)
 def _load_default_data() -> pd.DataFrame:
-    """Загружает демонстрационный датасет."""
-    return pd.read_csv("data/sample_tickets.csv")
+    """
+    Загружает демонстрационный датасет (кэшируется между перезапусками скрипта).
+    Если есть актуальная Parquet-копия (scripts/csv_to_parquet.py), читается она.
+    """
+    if os.path.exists(DEFAULT_DATA_PARQUET) and (
+        os.path.getmtime(DEFAULT_DATA_PARQUET) >= os.path.getmtime(DEFAULT_DATA_CSV)
+    ):
+        return pd.read_parquet(DEFAULT_DATA_PARQUET, engine="pyarrow")
+    return pd.read_csv(DEFAULT_DATA_CSV, engine="pyarrow", dtype=TICKETS_DTYPES)
+
+
+@st.cache_data(show_spinner=False)
+def _read_uploaded(buf_bytes: bytes) -> pd.DataFrame:
+    """Читает загруженный CSV; кэш привязан к содержимому файла."""
+    return pd.read_csv(io.BytesIO(buf_bytes), engine="pyarrow")
+
+
+@st.cache_data(show_spinner=False)
+def _df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Сериализует датафрейм в CSV один раз для одних и тех же данных."""
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _figure_to_png(fig) -> bytes:
+    """Рендерит фигуру matplotlib в PNG и освобождает её."""
+    import matplotlib.pyplot as plt
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def _eda_figures_png(df: pd.DataFrame) -> list[bytes]:
+    """Строит графики EDA один раз для одних и тех же данных и возвращает их в виде PNG."""
+    return [
+        _figure_to_png(plot_ticket_counts_by_department(df)),
+        _figure_to_png(plot_ticket_counts_by_device_type(df)),
+        _figure_to_png(plot_device_age_hist(df)),
+        _figure_to_png(plot_tickets_last_6_months_hist(df)),
+    ]
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_transform(
+    _df_train: pd.DataFrame,
+    _df_test: pd.DataFrame,
+    df_hash: bytes,
+    categorical_cols: tuple,
+    numeric_cols: tuple,
+    target_column: str,
+    test_size: float,
+    random_state: int,
+) -> tuple:
+    """
+    Предобрабатывает разбиение один раз для всех сравниваемых моделей.
+    Выборки не хэшируются (префикс `_`): разбиение однозначно задаётся хэшем исходных
+    данных, долей тестовой выборки и random_state; число хранимых разбиений ограничено.
+    """
+    return transform_train_test(
+        df_train=_df_train,
+        df_test=_df_test,
+        target_column=target_column,
+        categorical_cols=list(categorical_cols),
+        numeric_cols=list(numeric_cols),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _metrics_store() -> dict:
+    """
+    Метрики уже обученных моделей в памяти процесса: ключ — параметры разбиения и имя модели.
+    Отдельное хранилище вместо st.cache_data позволяет узнать, каких моделей нет в кэше,
+    и обучить их одним параллельным вызовом compare_models.
+    """
+    return {}
+
+
+@st.cache_data(show_spinner=False)
+def _load_config() -> dict:
+    """Кэширующая обёртка над load_config."""
+    return load_config()
 
 
 def page_overview() -> None:
@@ -67,11 +156,9 @@ def page_data(df: pd.DataFrame, cfg: dict) -> None:
         st.write(df[cfg["numeric_columns"]].describe())
 
     if st.checkbox("Скачать текущий датасет в CSV"):
-        buf = io.StringIO()
-        df.to_csv(buf, index=False)
         st.download_button(
             "Скачать CSV",
-            data=buf.getvalue(),
+            data=_df_to_csv_bytes(df),
             file_name="current_dataset.csv",
             mime="text/csv",
         )
@@ -128,16 +215,22 @@ def page_model_comparison(df: pd.DataFrame, cfg: dict) -> None:
     # Приводим целевую переменную к числовому виду (0/1). Некорректные значения станут NaN и будут удалены.
     df_split[target_col] = pd.to_numeric(df_split[target_col], errors="coerce")
     df_split = df_split.dropna(subset=[target_col])
-    df_split[target_col] = df_split[target_col].astype(int)
+    # Сначала приводим к int64, как раньше astype(int), и оставляем только классы 0/1:
+    # прямое приведение к int8 заворачивало бы метки вне диапазона (256 -> 0, 257 -> 1)
+    df_split[target_col] = df_split[target_col].astype(np.int64)
+    df_split = df_split[df_split[target_col].isin([0, 1])].astype({target_col: np.int8})
+    # Целевой вектор материализуем один раз: он же используется для стратификации
+    y_all = df_split[target_col].to_numpy(dtype=np.int8, copy=False)
 
     # Если остался только один класс, стратификация невозможна — в этом случае делим без stratify
-    y_unique = df_split[target_col].nunique(dropna=True)
+    y_unique = np.unique(y_all).size
 
     if y_unique < 2:
         df_train, df_test = train_test_split(
             df_split,
             test_size=test_size,
             random_state=random_state,
+            shuffle=True,
         )
         st.warning("В целевой переменной доступен только один класс; разбиение выполнено без стратификации.")
     else:
@@ -145,7 +238,8 @@ def page_model_comparison(df: pd.DataFrame, cfg: dict) -> None:
             df_split,
             test_size=test_size,
             random_state=random_state,
-            stratify=df_split[target_col].values,
+            shuffle=True,
+            stratify=y_all,
         )
 
     models_to_compare = st.multiselect(
@@ -155,18 +249,29 @@ def page_model_comparison(df: pd.DataFrame, cfg: dict) -> None:
     )
 
     if st.button("Обучить и сравнить модели"):
-        metrics_all = {}
-        for name in models_to_compare:
-            with st.spinner(f"Обучение модели {name}..."):
-                _, metrics = fit_model_and_evaluate(
-                    df_train=df_train,
-                    df_test=df_test,
-                    target_column=target_col,
-                    categorical_cols=cfg["categorical_columns"],
-                    numeric_cols=cfg["numeric_columns"],
-                    model_name=name,
-                )
-            metrics_all[name] = metrics
+        # Хэш данных считаем один раз: вместе с параметрами разбиения он служит ключом кэша
+        df_hash = pd.util.hash_pandas_object(df).values.tobytes()
+
+        split_key = (
+            df_hash,
+            tuple(cfg["categorical_columns"]),
+            tuple(cfg["numeric_columns"]),
+            target_col,
+            float(test_size),
+            int(random_state),
+        )
+        store = _metrics_store()
+
+        # Уже обученные на тех же данных модели повторно не обучаются; остальные обучаются
+        # параллельно на общей предобработке, которая кэшируется в _cached_transform
+        missing = [name for name in models_to_compare if (split_key, name) not in store]
+        if missing:
+            with st.spinner(f"Обучение моделей: {', '.join(missing)}..."):
+                X_train, y_train, X_test, y_test = _cached_transform(df_train, df_test, *split_key)
+                for name, metrics in compare_models(X_train, y_train, X_test, y_test, missing).items():
+                    store[(split_key, name)] = metrics
+
+        metrics_all = {name: store[(split_key, name)] for name in models_to_compare}
 
         st.markdown("### Итоговая таблица метрик")
         md = metrics_to_markdown_table(metrics_all)
@@ -178,14 +283,16 @@ def page_eda(df: pd.DataFrame) -> None:
     st.subheader("Разведочный анализ данных (EDA)")
     st.write("Всего записей:", len(df))
 
+    by_department, by_device_type, age_hist, tickets_hist = _eda_figures_png(df)
+
     col1, col2 = st.columns(2)
     with col1:
-        st.pyplot(plot_ticket_counts_by_department(df))
+        st.image(by_department)
     with col2:
-        st.pyplot(plot_ticket_counts_by_device_type(df))
+        st.image(by_device_type)
 
-    st.pyplot(plot_device_age_hist(df))
-    st.pyplot(plot_tickets_last_6_months_hist(df))
+    st.image(age_hist)
+    st.image(tickets_hist)
 
 
 def page_report(df: pd.DataFrame, cfg: dict) -> None:
@@ -198,19 +305,17 @@ def page_report(df: pd.DataFrame, cfg: dict) -> None:
     feature_cols = cfg["categorical_columns"] + cfg["numeric_columns"]
 
     if st.button("Загрузить модель и выполнить оценку"):
+        # dropna и так возвращает новый датафрейм — предварительная копия не нужна
+        df_sample = df.dropna(subset=[target_col])
+        # int64, как astype(int) ранее: int8 молча заворачивал бы метки вне 0/1 (256 -> 0) в «верные» классы
+        y_true = df_sample[target_col].to_numpy(dtype=np.int64)
+
         try:
-            model = load_model(model_path)
+            labels, proba = predict_needs_upgrade_cached(model_path, df_sample, feature_cols)
         except FileNotFoundError as exc:
             st.error(str(exc))
             return
 
-        df_sample = df.copy()
-        df_sample = df_sample.dropna(subset=[target_col])
-        X = df_sample[feature_cols]
-        y_true = df_sample[target_col].astype(int).values
-
-        labels, proba = predict_needs_upgrade(model, df_sample, feature_cols)
-
         from src.evaluation import evaluate_binary_classifier
 
         metrics = evaluate_binary_classifier(y_true, labels, proba)
@@ -228,16 +333,12 @@ def page_report(df: pd.DataFrame, cfg: dict) -> None:
             st.pyplot(plot_pr_curve(y_true, proba))
 
         st.markdown("### Пример прогноза по первым 20 записям")
-        df_preview = df_sample.head(20).copy()
-        df_preview["pred_label"] = labels[:20]
-        df_preview["pred_proba"] = proba[:20]
+        df_preview = df_sample.head(20).assign(pred_label=labels[:20], pred_proba=proba[:20])
         st.dataframe(df_preview)
 
-        buf = io.StringIO()
-        df_preview.to_csv(buf, index=False)
         st.download_button(
             "Скачать пример прогноза (CSV)",
-            data=buf.getvalue(),
+            data=_df_to_csv_bytes(df_preview),
             file_name="model_report_sample_predictions.csv",
             mime="text/csv",
         )
@@ -256,17 +357,17 @@ def main() -> None:
 """
     )
 
-    cfg = load_config()
+    cfg = _load_config()
 
     st.sidebar.header("Загрузка данных")
     uploaded_file = st.sidebar.file_uploader("Загрузите CSV с обращениями", type=["csv"])
 
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        df = _read_uploaded(uploaded_file.getvalue())
         st.success("Данные успешно загружены.")
     else:
         df = _load_default_data()
-        st.info("Используется демонстрационный датасет `data/sample_tickets.csv`.")
+        st.info(f"Используется демонстрационный датасет `{DEFAULT_DATA_CSV}`.")
 
     page = st.sidebar.radio(
         "Раздел приложения",
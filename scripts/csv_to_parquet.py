@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Однократная конвертация демонстрационного датасета в Parquet.
+
+Запуск из корня проекта: python scripts/csv_to_parquet.py
+Приложение читает data/sample_tickets.parquet, если он не старше CSV-файла;
+иначе используется исходный data/sample_tickets.csv.
+
+Автор: Ревнивцев Артем Александрович
+Тема ВКР: Интеллектуальная система прогнозирования потребностей в обновлении вычислительной техники.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.data_loader import TICKETS_DTYPES  # noqa: E402
+
+CSV_PATH = ROOT / "data" / "sample_tickets.csv"
+PARQUET_PATH = ROOT / "data" / "sample_tickets.parquet"
+
+
+def main() -> None:
+    df = pd.read_csv(CSV_PATH, engine="pyarrow", dtype=TICKETS_DTYPES)
+    # zstd + словарное кодирование категорий: файл меньше, чтение быстрее, типы сохраняются
+    df.to_parquet(PARQUET_PATH, engine="pyarrow", compression="zstd", index=False)
+    print(f"Сохранено {len(df)} строк в {PARQUET_PATH.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,14 +10,17 @@ from __future__ import annotations
 
 import json
 import os
+import pickle
 from typing import Dict, Any, Tuple, List
 
 import joblib
 import numpy as np
+from joblib import Parallel, delayed
 import pandas as pd
+import streamlit as st
 from sklearn.pipeline import Pipeline
 
-from .preprocessing import build_preprocessing_pipeline
+from .preprocessing import build_preprocessing_pipeline, preprocessing_n_jobs
 from .models import (
     build_logistic_regression,
     build_knn,
@@ -32,7 +35,7 @@ from .evaluation import evaluate_binary_classifier
 def _sanitize_target(df: pd.DataFrame, target_column: str) -> pd.DataFrame:
     """
     Готовит целевую переменную к обучению: приводит к числовому виду, удаляет NaN/inf и оставляет только 0/1.
-    Это необходимо для корректной работы astype(int) и stratify в train_test_split.
+    Это необходимо для корректного приведения к целому типу и stratify в train_test_split.
     """
     df = df.copy()
     if target_column not in df.columns:
@@ -48,10 +51,25 @@ def _sanitize_target(df: pd.DataFrame, target_column: str) -> pd.DataFrame:
 
     # Оставляем только допустимые классы 0/1
     df = df[df[target_column].isin([0, 1])]
-    df[target_column] = df[target_column].astype(int)
+    # метки 0/1 хранятся в int8: в 8 раз меньше памяти при разбиении и стратификации
+    df[target_column] = df[target_column].astype(np.int8)
     return df
 
 
+def _predict_labels_and_proba(model, X) -> Tuple[np.ndarray, np.ndarray | None]:
+    """
+    Возвращает метки и вероятности положительного класса за один проход модели:
+    метки получаются порогом 0.5 по predict_proba, без отдельного вызова predict.
+    """
+    if hasattr(model, "predict_proba"):
+        y_proba = model.predict_proba(X)[:, 1]
+        y_pred = (y_proba >= 0.5).astype(np.int8)
+    else:
+        y_proba = None
+        y_pred = model.predict(X)
+    return y_pred, y_proba
+
+
 def load_config(path: str = "config.json") -> Dict[str, Any]:
     """Загружает JSON-конфигурацию проекта."""
     with open(path, "r", encoding="utf-8") as f:
@@ -79,9 +97,10 @@ def build_pipeline(
     model_name: str,
     categorical_cols: List[str],
     numeric_cols: List[str],
+    n_jobs: int | None = None,
 ) -> Pipeline:
     """Формирует sklearn-пайплайн 'предобработка + модель'."""
-    preprocessor = build_preprocessing_pipeline(categorical_cols, numeric_cols)
+    preprocessor = build_preprocessing_pipeline(categorical_cols, numeric_cols, n_jobs=n_jobs)
     model = build_model_by_name(model_name)
 
     pipe = Pipeline(
@@ -93,6 +112,17 @@ def build_pipeline(
     return pipe
 
 
+def _fit_pipeline(pipeline: Pipeline, X: pd.DataFrame, y: np.ndarray) -> Pipeline:
+    """
+    Обучает пайплайн и затем отключает параллелизм предобработки: n_jobs выбирался
+    по размеру обучающей выборки, а при прогнозе на небольших наборах запуск воркеров
+    joblib обходился бы дороже самого преобразования.
+    """
+    pipeline.fit(X, y)
+    pipeline.set_params(preprocessor__n_jobs=None)
+    return pipeline
+
+
 def fit_model_and_evaluate(
     df_train: pd.DataFrame,
     df_test: pd.DataFrame,
@@ -106,24 +136,103 @@ def fit_model_and_evaluate(
     df_test = _sanitize_target(df_test, target_column)
 
     X_train = df_train[categorical_cols + numeric_cols]
-    y_train = df_train[target_column].astype(int).values
+    y_train = df_train[target_column].to_numpy(dtype=np.int8)
 
     X_test = df_test[categorical_cols + numeric_cols]
-    y_test = df_test[target_column].astype(int).values
-
-    pipeline = build_pipeline(model_name, categorical_cols, numeric_cols)
-    pipeline.fit(X_train, y_train)
+    y_test = df_test[target_column].to_numpy(dtype=np.int8)
 
-    y_pred = pipeline.predict(X_test)
-    if hasattr(pipeline, "predict_proba"):
-        y_proba = pipeline.predict_proba(X_test)[:, 1]
-    else:
-        y_proba = None
+    pipeline = build_pipeline(
+        model_name, categorical_cols, numeric_cols, n_jobs=preprocessing_n_jobs(len(X_train))
+    )
+    _fit_pipeline(pipeline, X_train, y_train)
 
+    y_pred, y_proba = _predict_labels_and_proba(pipeline, X_test)
     metrics = evaluate_binary_classifier(y_test, y_pred, y_proba)
     return pipeline, metrics
 
 
+def fit_transform_once(
+    df_train: pd.DataFrame,
+    df_test: pd.DataFrame,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+) -> Tuple[Any, Any]:
+    """
+    Обучает конвейер предобработки на обучающей выборке и преобразует обе выборки.
+    Результат общий для всех сравниваемых моделей (кэшируется на стороне приложения).
+    """
+    preprocessor = build_preprocessing_pipeline(
+        categorical_cols, numeric_cols, n_jobs=preprocessing_n_jobs(len(df_train))
+    )
+    X_train = preprocessor.fit_transform(df_train[categorical_cols + numeric_cols])
+    X_test = preprocessor.transform(df_test[categorical_cols + numeric_cols])
+    return X_train, X_test
+
+
+def transform_train_test(
+    df_train: pd.DataFrame,
+    df_test: pd.DataFrame,
+    target_column: str,
+    categorical_cols: List[str],
+    numeric_cols: List[str],
+) -> Tuple[Any, np.ndarray, Any, np.ndarray]:
+    """Готовит предобработанные матрицы признаков и целевые векторы для обеих выборок."""
+    df_train = _sanitize_target(df_train, target_column)
+    df_test = _sanitize_target(df_test, target_column)
+
+    X_train, X_test = fit_transform_once(df_train, df_test, categorical_cols, numeric_cols)
+    y_train = df_train[target_column].to_numpy(dtype=np.int8)
+    y_test = df_test[target_column].to_numpy(dtype=np.int8)
+    return X_train, y_train, X_test, y_test
+
+
+def fit_estimator_and_evaluate(
+    X_train: Any,
+    y_train: np.ndarray,
+    X_test: Any,
+    y_test: np.ndarray,
+    model_name: str,
+    n_jobs: int | None = None,
+) -> Tuple[Any, Dict[str, float]]:
+    """
+    Обучает модель на уже предобработанных признаках и оценивает её на тестовой выборке.
+    n_jobs, если задан, переопределяет внутренний параллелизм модели (для моделей с таким параметром).
+    """
+    model = build_model_by_name(model_name)
+    if n_jobs is not None and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+
+    y_pred, y_proba = _predict_labels_and_proba(model, X_test)
+    metrics = evaluate_binary_classifier(y_test, y_pred, y_proba)
+    return model, metrics
+
+
+def compare_models(
+    X_train: Any,
+    y_train: np.ndarray,
+    X_test: Any,
+    y_test: np.ndarray,
+    model_names: List[str],
+) -> Dict[str, Dict[str, float]]:
+    """
+    Обучает и оценивает несколько моделей параллельно — по отдельному процессу на модель.
+    Внутренний n_jobs моделей ограничивается, чтобы процессы не конкурировали за одни и те же ядра.
+    """
+    if not model_names:
+        return {}
+
+    n_cpu = os.cpu_count() or 1
+    n_jobs = max(1, min(len(model_names), n_cpu // 2))
+    inner_n_jobs = max(1, n_cpu // n_jobs)
+
+    results = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(fit_estimator_and_evaluate)(X_train, y_train, X_test, y_test, name, inner_n_jobs)
+        for name in model_names
+    )
+    return {name: metrics for name, (_, metrics) in zip(model_names, results)}
+
+
 def fit_on_full_and_save(
     df: pd.DataFrame,
     target_column: str,
@@ -136,30 +245,36 @@ def fit_on_full_and_save(
     df = _sanitize_target(df, target_column)
 
     X = df[categorical_cols + numeric_cols]
-    y = df[target_column].astype(int).values
+    y = df[target_column].to_numpy(dtype=np.int8)
 
-    pipeline = build_pipeline(model_name, categorical_cols, numeric_cols)
-    pipeline.fit(X, y)
+    pipeline = build_pipeline(model_name, categorical_cols, numeric_cols, n_jobs=preprocessing_n_jobs(len(X)))
+    _fit_pipeline(pipeline, X, y)
 
-    if hasattr(pipeline, "predict_proba"):
-        y_proba = pipeline.predict_proba(X)[:, 1]
-    else:
-        y_proba = None
-    y_pred = pipeline.predict(X)
+    y_pred, y_proba = _predict_labels_and_proba(pipeline, X)
     metrics = evaluate_binary_classifier(y, y_pred, y_proba)
 
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(pipeline, model_path)
+    # zlib-сжатие уровня 3 заметно уменьшает файлы ансамблей деревьев при небольшой цене на загрузку
+    joblib.dump(pipeline, model_path, compress=3, protocol=pickle.HIGHEST_PROTOCOL)
 
     return pipeline, metrics
 
 
+@st.cache_resource(show_spinner=False)
+def _load_model_cached(model_path: str, mtime: float) -> Pipeline:
+    """
+    Десериализует модель один раз на пару (путь, время изменения файла).
+    Время изменения входит в ключ кэша, чтобы после переобучения не отдавалась устаревшая модель.
+    """
+    model: Pipeline = joblib.load(model_path)
+    return model
+
+
 def load_model(model_path: str) -> Pipeline:
     """Загружает сохранённую модель."""
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Файл модели {model_path} не найден.")
-    model: Pipeline = joblib.load(model_path)
-    return model
+    return _load_model_cached(model_path, os.path.getmtime(model_path))
 
 
 def predict_needs_upgrade(
@@ -169,10 +284,41 @@ def predict_needs_upgrade(
 ) -> Tuple[np.ndarray, np.ndarray]:
     """Применяет модель к набору устройств и возвращает метки и вероятности."""
     X = df_inputs[feature_cols]
+    # вероятности в [0, 1] без потерь помещаются в float32, метки 0/1 — в int8
     if hasattr(model, "predict_proba"):
-        proba = model.predict_proba(X)[:, 1]
+        proba = model.predict_proba(X)[:, 1].astype(np.float32, copy=False)
     else:
         preds = model.predict(X)
-        proba = preds.astype(float)
-    labels = (proba >= 0.5).astype(int)
+        proba = preds.astype(np.float32)
+    labels = (proba >= 0.5).astype(np.int8)
     return labels, proba
+
+
+def _hash_dataframe(df: pd.DataFrame) -> Tuple[Tuple[int, int], bytes]:
+    """Дешёвый отпечаток датафрейма для ключа st.cache_data."""
+    return df.shape, pd.util.hash_pandas_object(df, index=False).values.tobytes()
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _hash_dataframe})
+def _predict_cached(
+    model_path: str,
+    mtime: float,
+    df_inputs: pd.DataFrame,
+    feature_cols: Tuple[str, ...],
+) -> Tuple[np.ndarray, np.ndarray]:
+    model = _load_model_cached(model_path, mtime)
+    return predict_needs_upgrade(model, df_inputs, list(feature_cols))
+
+
+def predict_needs_upgrade_cached(
+    model_path: str,
+    df_inputs: pd.DataFrame,
+    feature_cols: List[str],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Аналог predict_needs_upgrade для сохранённой модели с кэшированием результата.
+    Повторный вызов с теми же данными и тем же файлом модели не выполняет predict_proba заново.
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Файл модели {model_path} не найден.")
+    return _predict_cached(model_path, os.path.getmtime(model_path), df_inputs, tuple(feature_cols))
@@ -11,11 +11,25 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 
 import pandas as pd
 
 
+# Известная схема демонстрационного датасета обращений (data/sample_tickets.csv).
+# Объявлены только категориальные столбцы: они заметно уменьшают датафрейм в памяти.
+# Числовые и целевой столбцы типизируются позже (clean_dataset, _sanitize_target), так как
+# в выгрузках бывают пропуски меток и возраст в виде "low/medium/high", а строгий
+# int/float-тип уронил бы уже само чтение файла.
+TICKETS_DTYPES: Dict[str, str] = {
+    "user_department": "category",
+    "device_type": "category",
+    "os": "category",
+    "priority": "category",
+    "location": "category",
+}
+
+
 @dataclass
 class DatasetInfo:
     """Информация о загруженном датасете."""
@@ -26,9 +40,13 @@ class DatasetInfo:
     target_column: str
 
 
-def load_csv_local(path: str, target_column: str) -> Tuple[pd.DataFrame, DatasetInfo]:
-    """Загрузка CSV-файла из локальной файловой системы."""
-    df = pd.read_csv(path)
+def load_csv_local(
+    path: str,
+    target_column: str,
+    dtypes: Dict[str, str] | None = None,
+) -> Tuple[pd.DataFrame, DatasetInfo]:
+    """Загрузка CSV-файла из локальной файловой системы (многопоточный парсер pyarrow)."""
+    df = pd.read_csv(path, engine="pyarrow", dtype=dtypes)
     if target_column not in df.columns:
         raise ValueError(
             f"Целевой столбец '{target_column}' не найден в файле {path}. "
@@ -45,9 +63,13 @@ def load_csv_local(path: str, target_column: str) -> Tuple[pd.DataFrame, Dataset
     return df, info
 
 
-def load_csv_from_url(url: str, target_column: str) -> Tuple[pd.DataFrame, DatasetInfo]:
+def load_csv_from_url(
+    url: str,
+    target_column: str,
+    dtypes: Dict[str, str] | None = None,
+) -> Tuple[pd.DataFrame, DatasetInfo]:
     """Загрузка CSV-файла по URL (например, с Kaggle, GitHub, Google Drive и т.д.)."""
-    df = pd.read_csv(url)
+    df = pd.read_csv(url, engine="pyarrow", dtype=dtypes)
     if target_column not in df.columns:
         raise ValueError(
             f"Целевой столбец '{target_column}' не найден в данных по URL {url}. "
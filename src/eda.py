@@ -8,12 +8,19 @@
 
 from __future__ import annotations
 
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
+
 import pandas as pd
 
+# matplotlib импортируется внутри функций построения графиков, чтобы не замедлять запуск приложения
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 
 def plot_ticket_counts_by_department(df: pd.DataFrame) -> plt.Figure:
     """Количество обращений по подразделениям."""
+    import matplotlib.pyplot as plt
+
     counts = df["user_department"].value_counts()
     fig, ax = plt.subplots()
     counts.plot(kind="bar", ax=ax)
@@ -26,6 +33,8 @@ def plot_ticket_counts_by_department(df: pd.DataFrame) -> plt.Figure:
 
 def plot_ticket_counts_by_device_type(df: pd.DataFrame) -> plt.Figure:
     """Количество обращений по типам устройств."""
+    import matplotlib.pyplot as plt
+
     counts = df["device_type"].value_counts()
     fig, ax = plt.subplots()
     counts.plot(kind="bar", ax=ax)
@@ -38,6 +47,8 @@ def plot_ticket_counts_by_device_type(df: pd.DataFrame) -> plt.Figure:
 
 def plot_device_age_hist(df: pd.DataFrame) -> plt.Figure:
     """Гистограмма возраста устройств."""
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots()
     df["device_age_years"].hist(ax=ax, bins=10)
     ax.set_xlabel("Возраст устройства, лет")
@@ -49,6 +60,8 @@ def plot_device_age_hist(df: pd.DataFrame) -> plt.Figure:
 
 def plot_tickets_last_6_months_hist(df: pd.DataFrame) -> plt.Figure:
     """Гистограмма количества обращений за последние 6 месяцев."""
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots()
     df["tickets_last_6_months"].hist(ax=ax, bins=10)
     ax.set_xlabel("Обращений за 6 месяцев")
@@ -8,10 +8,10 @@
 
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any
 
-import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 from sklearn.metrics import (
     accuracy_score,
     precision_score,
@@ -21,8 +21,13 @@ from sklearn.metrics import (
     roc_curve,
     precision_recall_curve,
     confusion_matrix,
+    ConfusionMatrixDisplay,
 )
 
+# pyplot нужен только для графиков и импортируется внутри plot_*-функций
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 
 def evaluate_binary_classifier(
     y_true: np.ndarray,
@@ -46,23 +51,21 @@ def evaluate_binary_classifier(
 
 def plot_confusion_matrix(y_true: np.ndarray, y_pred_labels: np.ndarray) -> plt.Figure:
     """Строит матрицу ошибок для бинарной классификации."""
+    import matplotlib.pyplot as plt
+
     cm = confusion_matrix(y_true, y_pred_labels)
     fig, ax = plt.subplots()
-    im = ax.imshow(cm)
+    ConfusionMatrixDisplay(cm).plot(ax=ax, colorbar=True)
     ax.set_xlabel("Предсказанный класс")
     ax.set_ylabel("Истинный класс")
-    ax.set_xticks([0, 1])
-    ax.set_yticks([0, 1])
-    for i in range(cm.shape[0]):
-        for j in range(cm.shape[1]):
-            ax.text(j, i, cm[i, j], ha="center", va="center")
-    fig.colorbar(im)
     fig.tight_layout()
     return fig
 
 
 def plot_roc_curve(y_true: np.ndarray, y_pred_proba: np.ndarray) -> plt.Figure:
     """Строит ROC-кривую."""
+    import matplotlib.pyplot as plt
+
     fpr, tpr, _ = roc_curve(y_true, y_pred_proba)
     fig, ax = plt.subplots()
     ax.plot(fpr, tpr, label="ROC")
@@ -77,6 +80,8 @@ def plot_roc_curve(y_true: np.ndarray, y_pred_proba: np.ndarray) -> plt.Figure:
 
 def plot_pr_curve(y_true: np.ndarray, y_pred_proba: np.ndarray) -> plt.Figure:
     """Строит PR-кривую (precision-recall)."""
+    import matplotlib.pyplot as plt
+
     precision, recall, _ = precision_recall_curve(y_true, y_pred_proba)
     fig, ax = plt.subplots()
     ax.plot(recall, precision, label="PR")
@@ -90,18 +95,17 @@ def plot_pr_curve(y_true: np.ndarray, y_pred_proba: np.ndarray) -> plt.Figure:
 
 def metrics_to_markdown_table(metrics: Dict[str, Dict[str, float]]) -> str:
     """Преобразует словарь метрик по моделям в markdown-таблицу."""
-    headers = ["Модель", "Accuracy", "Precision", "Recall", "F1", "ROC-AUC"]
-    lines: List[str] = []
-    lines.append("| " + " | ".join(headers) + " |")
-    lines.append("|" + "|".join(["---"] * len(headers)) + "|")
-    for model_name, vals in metrics.items():
-        row = [
-            model_name,
-            f"{vals.get('accuracy', float('nan')):.3f}",
-            f"{vals.get('precision', float('nan')):.3f}",
-            f"{vals.get('recall', float('nan')):.3f}",
-            f"{vals.get('f1', float('nan')):.3f}",
-            f"{(vals.get('roc_auc') or float('nan')):.3f}",
-        ]
-        lines.append("| " + " | ".join(row) + " |")
-    return "\n".join(lines)
+    columns = {
+        "accuracy": "Accuracy",
+        "precision": "Precision",
+        "recall": "Recall",
+        "f1": "F1",
+        "roc_auc": "ROC-AUC",
+    }
+    table = (
+        pd.DataFrame.from_dict(metrics, orient="index", dtype=float)
+        .reindex(columns=list(columns))
+        .rename(columns=columns)
+    )
+    table.index.name = "Модель"
+    return table.to_markdown(floatfmt=".3f")
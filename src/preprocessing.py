@@ -8,51 +8,175 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple, Dict
+import numbers
+from typing import Any, List, Tuple, Dict
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.model_selection import train_test_split
+from sklearn.utils import _safe_indexing
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import FunctionTransformer
 
+__all__ = [
+    "FastOneHotEncoder",
+    "preprocessing_n_jobs",
+    "build_preprocessing_pipeline",
+    "prepare_features_target",
+    "train_test_split_stratified",
+]
+
+# Параллельный ColumnTransformer окупает запуск воркеров joblib только на достаточно больших выборках
+PARALLEL_MIN_ROWS = 10_000
+
 
 def _to_numeric(df_like):
     """
     Преобразует вход к числовому формату для числовых признаков.
-    ColumnTransformer может передавать numpy-массив; функция возвращает numpy-массив float.
+    ColumnTransformer может передавать numpy-массив; функция возвращает numpy-массив float32
+    (SimpleImputer и StandardScaler сохраняют этот тип, поэтому весь числовой блок остаётся float32).
     Неконвертируемые значения становятся NaN (дальше их обработает SimpleImputer).
     """
-    import numpy as _np
-    import pandas as _pd
+    arr = np.asarray(df_like)
+    if arr.dtype.kind in "biuf":
+        out = arr.astype(np.float32, copy=False)
+    else:
+        # Один вызов to_numeric на «сплющенном» массиве вместо цикла по столбцам
+        flat = pd.to_numeric(pd.Series(arr.reshape(-1)), errors="coerce")
+        out = flat.to_numpy(dtype=np.float32).reshape(arr.shape)
+
+    # Бесконечности считаем пропусками (SimpleImputer не принимает inf); вход не изменяем
+    inf_mask = np.isinf(out)
+    if inf_mask.any():
+        out = np.where(inf_mask, np.float32(np.nan), out)
+    return out
+
+
+def _iter_columns(X):
+    """Перебирает столбцы DataFrame или двумерного массива."""
+    if isinstance(X, pd.DataFrame):
+        for name in X.columns:
+            yield X[name]
+    else:
+        arr = np.asarray(X, dtype=object)
+        for i in range(arr.shape[1]):
+            yield arr[:, i]
+
+
+def _none_mask(col) -> np.ndarray:
+    """
+    Позиции None в object-столбце. SimpleImputer считает пропуском только NaN, поэтому
+    OneHotEncoder кодировал None отдельной категорией; в category-столбцах None не бывает.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype) or col.dtype != object:
+        return np.zeros(len(col), dtype=bool)
+    return np.equal(np.asarray(col, dtype=object), None)
+
+
+class FastOneHotEncoder(BaseEstimator, TransformerMixin):
+    """
+    One-hot кодирование через коды pandas.Categorical с единственной сборкой CSR-матрицы.
+
+    Поведение совпадает с SimpleImputer(strategy="most_frequent") + OneHotEncoder(handle_unknown="ignore"):
+    NaN заменяются самой частой категорией обучающей выборки, None в object-столбцах кодируется
+    отдельной последней категорией, неиспользуемые категории category-столбцов не дают
+    лишних столбцов, неизвестные категории кодируются нулевой строкой. Вместо поиска
+    в словаре для каждого значения используются целочисленные коды категорий.
+    """
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.categories_ = []
+        self.has_none_ = []
+        self.most_frequent_ = []
+        for col in _iter_columns(X):
+            # категории dtype, взятые из полного датафрейма, переживают разбиение на выборки
+            cat = pd.Categorical(col).remove_unused_categories()
+            n_categories = len(cat.categories)
+            codes = np.asarray(cat.codes, dtype=np.int32)
+            none = _none_mask(col)
+            has_none = bool(none.any())
+            if has_none:
+                codes = np.where(none, n_categories, codes)
+            counts = np.bincount(codes[codes >= 0], minlength=n_categories + has_none)
+            self.categories_.append(cat.categories)
+            self.has_none_.append(has_none)
+            # при равенстве частот берётся меньшая категория, как в SimpleImputer
+            self.most_frequent_.append(int(np.argmax(counts)) if len(counts) else -1)
+        self.n_features_in_ = len(self.categories_)
+        return self
+
+    def transform(self, X):
+        n_rows = len(X)
+        rows, cols = [], []
+        offset = 0
+        for i, col in enumerate(_iter_columns(X)):
+            categories = self.categories_[i]
+            codes = np.asarray(pd.Categorical(col, categories=categories).codes, dtype=np.int32)
+            none = _none_mask(col)
+            # None, не встречавшийся при обучении, как и у OneHotEncoder, считается неизвестной категорией
+            if self.has_none_[i]:
+                codes = np.where(none, len(categories), codes)
+            missing = np.asarray(pd.isna(col)) & ~none
+            if missing.any() and self.most_frequent_[i] >= 0:
+                codes = np.where(missing, self.most_frequent_[i], codes)
+            valid = codes >= 0
+            rows.append(np.flatnonzero(valid))
+            cols.append(codes[valid] + offset)
+            offset += len(categories) + self.has_none_[i]
 
-    # Приводим к DataFrame для удобной конвертации
-    _df = _pd.DataFrame(df_like)
-    for c in _df.columns:
-        _df[c] = _pd.to_numeric(_df[c], errors="coerce")
-    return _df.values
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+        data = np.ones(len(rows), dtype=self.dtype)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n_rows, offset), dtype=self.dtype)
+
+    def get_feature_names_out(self, input_features=None):
+        if input_features is None:
+            input_features = getattr(
+                self, "feature_names_in_", [f"x{i}" for i in range(self.n_features_in_)]
+            )
+        names = []
+        for name, cats, has_none in zip(input_features, self.categories_, self.has_none_):
+            names.extend(f"{name}_{cat}" for cat in cats)
+            if has_none:
+                names.append(f"{name}_None")
+        return np.asarray(names, dtype=object)
+
+
+def preprocessing_n_jobs(n_rows: int) -> int | None:
+    """Число процессов для ColumnTransformer: все ядра для больших выборок, иначе без параллелизма."""
+    return -1 if n_rows > PARALLEL_MIN_ROWS else None
 
 
 def build_preprocessing_pipeline(
     categorical_cols: List[str],
     numeric_cols: List[str],
+    n_jobs: int | None = None,
 ) -> ColumnTransformer:
-    """Формирует конвейер предобработки признаков."""
-    categorical_transformer = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(strategy="most_frequent")),
-            ("ohe", OneHotEncoder(handle_unknown="ignore")),
-        ]
-    )
+    """
+    Формирует конвейер предобработки признаков.
+    Категориальная и числовая ветки независимы, при n_jobs != None они выполняются параллельно
+    (значение обычно берётся из preprocessing_n_jobs).
+    """
+    # FastOneHotEncoder сам подставляет самую частую категорию вместо пропусков,
+    # поэтому ветка состоит из одного шага и передаётся в ColumnTransformer без обёртки Pipeline
+    categorical_transformer = FastOneHotEncoder(dtype=np.float32)
 
     numeric_transformer = Pipeline(
         steps=[
             ("to_numeric", FunctionTransformer(_to_numeric, validate=False)),
             ("imputer", SimpleImputer(strategy="median")),
-            ("scaler", StandardScaler()),
+            # вход приходит из импьютера свежим массивом, поэтому масштабируем на месте
+            ("scaler", StandardScaler(copy=False)),
         ]
     )
 
@@ -62,6 +186,10 @@ def build_preprocessing_pipeline(
             ("numeric", numeric_transformer, numeric_cols),
         ],
         remainder="drop",
+        # формат выхода выбирается по плотности (sparse_threshold=0.3 по умолчанию): при малом
+        # числе категорий это плотный float32-массив (~0.4 ненулевых на демо-схеме), при
+        # высококардинальных категориях — CSR, иначе плотная матрица не поместилась бы в память
+        n_jobs=n_jobs,
     )
     return preprocessor
 
@@ -71,44 +199,95 @@ def prepare_features_target(
     target_column: str,
     categorical_cols: List[str],
     numeric_cols: List[str],
-) -> Tuple[pd.DataFrame, np.ndarray, Dict[str, List[str]]]:
+) -> Tuple[pd.DataFrame, np.ndarray, Dict[str, Any]]:
     """Делит датафрейм на матрицу признаков X и вектор целей y."""
-    missing_cols = [c for c in categorical_cols + numeric_cols if c not in df.columns]
-    if missing_cols:
+    feature_cols = [*categorical_cols, *numeric_cols]
+    positions = df.columns.get_indexer(feature_cols)
+    if np.any(positions == -1):
+        missing_cols = [c for c, pos in zip(feature_cols, positions) if pos == -1]
         raise ValueError(f"В датасете отсутствуют необходимые столбцы: {missing_cols}")
 
     if target_column not in df.columns:
         raise ValueError(f"Целевой столбец '{target_column}' не найден.")
 
-    df = df.copy()
-    df[target_column] = pd.to_numeric(df[target_column], errors="coerce")
-    df = df.replace([np.inf, -np.inf], np.nan)
-    df = df.dropna(subset=[target_column])
-    df = df[df[target_column].isin([0, 1])]
-    df[target_column] = df[target_column].astype(int)
+    # Одна булева маска вместо цепочки copy/replace/dropna/isin, каждая из которых копирует весь датафрейм.
+    # NaN и ±inf не проходят сравнение с 0/1, поэтому отсекаются той же маской.
+    y_raw = pd.to_numeric(df[target_column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = (y_raw == 0) | (y_raw == 1)
+
+    X = df.loc[mask, feature_cols]
+    # булева индексация уже даёт новый массив; ascontiguousarray гарантирует единичный шаг для C-кода
+    y = np.ascontiguousarray(y_raw[mask], dtype=np.int8)
 
-    X = df[categorical_cols + numeric_cols]
-    y = df[target_column].values
+    # Категориальные столбцы переводятся в category один раз: кодировщик дальше работает
+    # с целочисленными кодами, а не со строками. Неиспользуемые категории (после маски или
+    # унаследованные из исходного dtype) отбрасываются, чтобы набор совпадал с object-столбцом.
+    X = X.astype({c: "category" for c in categorical_cols})
+    for c in categorical_cols:
+        X[c] = X[c].cat.remove_unused_categories()
 
     meta = {
         "categorical_cols": categorical_cols,
         "numeric_cols": numeric_cols,
+        # категории обучающей выборки: новые строки приводятся к ним через
+        # pd.Categorical(col, categories=meta["cats"][c])
+        "cats": {c: X[c].cat.categories for c in categorical_cols},
     }
     return X, y, meta
 
 
+def _class_test_count(n: int, test_size: float) -> int:
+    """
+    Размер тестовой части класса из n объектов: округление до ближайшего целого,
+    но не меньше одного объекта в тесте и в обучении, если в классе их хотя бы два.
+    Иначе редкий класс мог целиком остаться в обучении, и recall/ROC-AUC на тесте
+    были бы не определены.
+    """
+    n_test = int(n * test_size + 0.5)
+    if n >= 2:
+        n_test = min(max(n_test, 1), n - 1)
+    return n_test
+
+
 def train_test_split_stratified(
     X: pd.DataFrame,
     y: np.ndarray,
-    test_size: float = 0.2,
+    test_size: float | int = 0.2,
     random_state: int = 42,
 ) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray, np.ndarray]:
     """Делит выборку на обучающую и тестовую с сохранением пропорций классов."""
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=test_size,
-        random_state=random_state,
-        stratify=y,
-    )
+    y = np.asarray(y)
+    is_binary = y.dtype.kind in "biu" and np.all((y == 0) | (y == 1))
+    # целочисленный test_size — это число строк, а не доля: такой случай остаётся за sklearn
+    if not is_binary or isinstance(test_size, numbers.Integral):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X,
+            y,
+            test_size=test_size,
+            random_state=random_state,
+            stratify=y,
+        )
+        return X_train, X_test, y_train, y_test
+
+    # Для бинарной цели стратификация сводится к перемешиванию индексов каждого класса
+    # и отрезанию доли test_size — без сортировки y и общей логики StratifiedShuffleSplit
+    rng = np.random.default_rng(random_state)
+    idx_0 = np.flatnonzero(y == 0)
+    idx_1 = np.flatnonzero(y == 1)
+    rng.shuffle(idx_0)
+    rng.shuffle(idx_1)
+
+    n_test_0 = _class_test_count(len(idx_0), test_size)
+    n_test_1 = _class_test_count(len(idx_1), test_size)
+    test_idx = np.concatenate([idx_0[:n_test_0], idx_1[:n_test_1]])
+    train_idx = np.concatenate([idx_0[n_test_0:], idx_1[n_test_1:]])
+    rng.shuffle(train_idx)
+    rng.shuffle(test_idx)
+
+    if isinstance(X, pd.DataFrame):
+        X_train, X_test = X.take(train_idx, axis=0), X.take(test_idx, axis=0)
+    else:
+        # ndarray, разреженные матрицы и списки — как в sklearn.model_selection.train_test_split
+        X_train, X_test = _safe_indexing(X, train_idx), _safe_indexing(X, test_idx)
+    y_train, y_test = y[train_idx], y[test_idx]
     return X_train, X_test, y_train, y_test
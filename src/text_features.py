@@ -8,27 +8,186 @@
 
 from __future__ import annotations
 
-from typing import Tuple
+from typing import List, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import (
+    CountVectorizer,
+    HashingVectorizer,
+    TfidfTransformer,
+    TfidfVectorizer,
+)
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import normalize
 
+# Начиная с этого размера корпуса словарь TfidfVectorizer заменяется хешированием признаков
+HASHING_MIN_ROWS = 100_000
 
-def build_text_vectorizer(max_features: int = 5000) -> TfidfVectorizer:
-    """Создаёт TF-IDF векторизатор для поля problem_description."""
+TextVectorizer = Union[TfidfVectorizer, Pipeline]
+
+
+def build_text_vectorizer(
+    max_features: int = 5000,
+    ngram_range: Tuple[int, int] = (1, 1),
+) -> TfidfVectorizer:
+    """
+    Создаёт TF-IDF векторизатор для поля problem_description.
+    По умолчанию только униграммы: биграммы многократно раздувают список кандидатов при fit,
+    их можно включить через ngram_range=(1, 2).
+    """
     vectorizer = TfidfVectorizer(
         max_features=max_features,
-        ngram_range=(1, 2),
+        ngram_range=ngram_range,
         min_df=2,
+        # float32 вдвое уменьшает CSR-матрицу и все последующие разреженные произведения
+        dtype=np.float32,
+        sublinear_tf=True,
+        norm="l2",
+        # тексты приводятся к нижнему регистру заранее, в prepare_texts
+        lowercase=False,
+        strip_accents=None,
     )
     return vectorizer
 
 
-def fit_text_vectorizer(df: pd.DataFrame, text_column: str) -> Tuple[TfidfVectorizer, any]:
-    """Обучает TF-IDF на текстовом столбце и возвращает матрицу признаков."""
+def build_hashed_text_vectorizer(
+    n_features: int = 2**18,
+    ngram_range: Tuple[int, int] = (1, 1),
+) -> Pipeline:
+    """
+    TF-IDF без словаря: HashingVectorizer + TfidfTransformer.
+    Не хранит отображение «токен -> индекс», поэтому требует меньше памяти на больших корпусах
+    и допускает обработку данных частями.
+    """
+    return Pipeline(
+        steps=[
+            (
+                "hashing",
+                HashingVectorizer(
+                    n_features=n_features,
+                    ngram_range=ngram_range,
+                    alternate_sign=False,
+                    norm=None,
+                    lowercase=False,
+                    dtype=np.float32,
+                ),
+            ),
+            ("tfidf", TfidfTransformer(sublinear_tf=True, norm="l2")),
+        ]
+    )
+
+
+def prepare_texts(df: pd.DataFrame, text_column: str) -> np.ndarray:
+    """
+    Готовит корпус для векторизатора: пропуски -> пустая строка, нижний регистр.
+    Регистр приводится один раз здесь, а не для каждого документа внутри токенизатора,
+    поэтому векторизатор создаётся с lowercase=False и все тексты, в том числе
+    при прогнозе, должны проходить через эту функцию.
+    """
     if text_column not in df.columns:
         raise ValueError(f"Столбец с текстом '{text_column}' не найден.")
 
-    vectorizer = build_text_vectorizer()
-    X_text = vectorizer.fit_transform(df[text_column].fillna(""))
+    # пропуски заменяем пустой строкой прямо в ndarray, без промежуточной Series
+    col = df[text_column].to_numpy(copy=False)
+    texts = np.where(pd.isna(col), "", col)
+    # массив остаётся object: np.char/astype(str) дали бы фиксированную ширину <U{max_len},
+    # и один длинный текст раздувал бы память под весь корпус
+    return np.array([str(text).lower() for text in texts], dtype=object)
+
+
+def _identity_analyzer(tokens: List[str]) -> List[str]:
+    """Анализатор для уже токенизированных документов."""
+    return tokens
+
+
+def _fit_transform_deduplicated(
+    vectorizer: TextVectorizer,
+    unique_texts: np.ndarray,
+    inverse: np.ndarray,
+) -> sparse.csr_matrix:
+    """
+    fit_transform корпуса unique_texts[inverse] с токенизацией только уникальных текстов.
+
+    Частоты документов (min_df, idf) считаются с учётом дубликатов: обучение на одних
+    уникальных текстах изменило бы словарь, а на шаблонных описаниях отсекло бы его целиком.
+    """
+    if isinstance(vectorizer, TfidfVectorizer):
+        analyze = vectorizer.build_analyzer()
+        tokens = [analyze(text) for text in unique_texts]
+        docs = [tokens[i] for i in inverse]
+        params = vectorizer.get_params()
+        # на время обучения векторизатор получает готовые токены; после восстановления
+        # параметров словарь и idf годятся для обычного transform по сырым текстам
+        vectorizer.set_params(analyzer=_identity_analyzer, ngram_range=(1, 1))
+        try:
+            return vectorizer.fit_transform(docs)
+        finally:
+            vectorizer.set_params(analyzer=params["analyzer"], ngram_range=params["ngram_range"])
+
+    # HashingVectorizer не имеет состояния: счётчики уникальных текстов размножаются по inverse,
+    # а idf обучается уже на полной матрице
+    (_, hasher), (_, tfidf) = vectorizer.steps
+    X_counts = hasher.transform(unique_texts)[inverse]
+    return tfidf.fit_transform(X_counts)
+
+
+def fit_transform_text(df: pd.DataFrame, text_column: str) -> Tuple[TextVectorizer, sparse.csr_matrix]:
+    """
+    Обучает TF-IDF на текстовом столбце и возвращает матрицу признаков.
+    Для корпусов от HASHING_MIN_ROWS строк используется build_hashed_text_vectorizer.
+
+    Обучающий корпус обрабатывается одним вызовом fit_transform: раздельные fit и transform
+    на одних и тех же текстах токенизируют корпус дважды, поэтому так делать не следует.
+
+    Шаблонные описания заявок сильно повторяются, поэтому токенизируется только каждый
+    уникальный текст (см. _fit_transform_deduplicated); матрица, словарь и idf совпадают
+    с обычным fit_transform на полном корпусе.
+    """
+    texts = prepare_texts(df, text_column)
+    # factorize хэширует строки без сортировки, в отличие от np.unique
+    inverse, unique_texts = pd.factorize(texts)
+
+    if len(texts) >= HASHING_MIN_ROWS:
+        vectorizer = build_hashed_text_vectorizer()
+    else:
+        vectorizer = build_text_vectorizer()
+    X_text = _fit_transform_deduplicated(vectorizer, unique_texts, inverse)
     return vectorizer, X_text
+
+
+def fast_tfidf_transform(vectorizer: TextVectorizer, texts: np.ndarray) -> sparse.csr_matrix:
+    """
+    TF-IDF преобразование уже подготовленных текстов (см. prepare_texts).
+    Для TfidfVectorizer веса idf применяются поэлементно к X.data по индексам столбцов,
+    вместо умножения на разреженную диагональную матрицу; результат совпадает с vectorizer.transform.
+    """
+    if not isinstance(vectorizer, TfidfVectorizer):
+        return vectorizer.transform(texts)
+
+    # счётчики токенов в dtype векторизатора (float32)
+    X = CountVectorizer.transform(vectorizer, texts)
+    if vectorizer.sublinear_tf:
+        np.log(X.data, out=X.data)
+        X.data += 1
+    if vectorizer.use_idf:
+        idf = vectorizer.idf_.astype(X.dtype, copy=False)
+        X.data *= np.take(idf, X.indices)
+    if vectorizer.norm is not None:
+        X = normalize(X, norm=vectorizer.norm, copy=False)
+    return X
+
+
+def transform_text(
+    vectorizer: TextVectorizer,
+    df: pd.DataFrame,
+    text_column: str,
+) -> sparse.csr_matrix:
+    """Преобразует новые тексты обученным векторизатором с той же нормализацией, что и при обучении."""
+    return fast_tfidf_transform(vectorizer, prepare_texts(df, text_column))
+
+
+def fit_text_vectorizer(df: pd.DataFrame, text_column: str) -> Tuple[TextVectorizer, sparse.csr_matrix]:
+    """Синоним fit_transform_text, оставлен для обратной совместимости."""
+    return fit_transform_text(df, text_column)